@@ -1,15 +1,116 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Final
 
-from pandas import DataFrame, Series, concat
-from panel import bind, depends
-from panel.pane import HTML, ECharts
+import numpy as np
+from bokeh.models import DateFormatter
+from pandas import DataFrame, RangeIndex, Series
+from pandas.api.types import is_datetime64_any_dtype
+from panel import bind, state
+from panel.io import hold
+from panel.pane import ECharts, Str
 from panel.viewable import Viewable
 from panel.widgets import Button, DatetimePicker, IntInput, Tabulator
 from param import Date, Integer, Parameterized, String
 from param import DataFrame as DF
 from param.parameterized import Event
 
+# Above this many records the chart is downsampled before being sent
+_CHART_MAX_POINTS = 2000
+
+# Chart updates arriving within this many milliseconds are merged into one
+_CHART_DEBOUNCE_MS = 300
+
+# Initial number of records the column buffers can hold before growing
+_INITIAL_CAPACITY = 16
+
+# Shown while there are no records; shared, so it must not be mutated
+_EMPTY_CHART_OPTION: Final[dict[str, Any]] = {
+    "xAxis": {"type": "time"},
+    "yAxis": {"type": "value"},
+    "series": [],
+}
+
+
+def _epoch_ms(timestamps: Series) -> np.ndarray:
+    """
+    Convert a timestamp column to integer milliseconds since the epoch.
+
+    Datetime columns are converted, integer columns are assumed to already
+    hold milliseconds. Datetimes are taken as nanoseconds, reinterpreted as
+    int64 in place and divided once, instead of casting through
+    datetime64[ms].
+    """
+
+    if is_datetime64_any_dtype(timestamps):
+        return timestamps.to_numpy(dtype="datetime64[ns]").view(np.int64) // 1_000_000
+    return timestamps.to_numpy(dtype=np.int64)
+
+
+def _check_records(records: DataFrame) -> None:
+    """
+    Apply the form's rules to records coming from elsewhere.
+
+    Timestamps and amounts must not be empty, and amounts must be >= 0.
+    """
+
+    if records["timestamp"].isna().any():
+        raise ValueError("Record timestamps must not be empty.")
+    if records["amount"].isna().any() or (records["amount"] < 0).any():
+        raise ValueError("Record amounts must not be empty or negative.")
+
+
+def _int32_amounts(amounts: Series) -> np.ndarray:
+    """
+    Convert an amount column to int32, rejecting values it cannot hold.
+    """
+
+    values = amounts.to_numpy(dtype=np.float64)
+    if not (values == np.trunc(values)).all():
+        raise ValueError("Amounts must be whole numbers.")
+    limits = np.iinfo(np.int32)
+    if len(values) and (values.min() < limits.min or values.max() > limits.max):
+        raise ValueError(f"Amounts must be between {limits.min} and {limits.max}.")
+    return values.astype(np.int32)
+
+
+def _downsample(x: np.ndarray, y: np.ndarray, target: int) -> list[list[int]]:
+    """
+    Reduce a series to `target` points using Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The points in between are
+    split into `target - 2` buckets, and from each bucket the point forming
+    the largest triangle with the previously selected point and the average
+    of the next bucket is kept.
+    """
+
+    n = len(x)
+    if n <= target:
+        return np.column_stack((x, y)).tolist()
+
+    xf = x.astype(float)
+    yf = y.astype(float)
+    edges = np.linspace(1, n - 1, target - 1).astype(int)
+
+    selected = np.empty(target, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(target - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xf[end:next_end].mean()
+        avg_y = yf[end:next_end].mean()
+
+        area = np.abs(
+            (xf[a] - avg_x) * (yf[start:end] - yf[a])
+            - (xf[a] - xf[start:end]) * (avg_y - yf[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return np.column_stack((x[selected], y[selected])).tolist()
+
 
 class OrangeProductionWidget(Parameterized):
     """
@@ -17,13 +118,25 @@ class OrangeProductionWidget(Parameterized):
     """
 
     # List of records:
-    # [{"timestamp": datetime, "amount": int}, ...]
-    records: DataFrame = DF(DataFrame(  # pyright: ignore[reportAssignmentType]
-        {
-            "timestamp": Series(dtype="datetime64[ns]"),
-            "amount": Series(dtype=int)
-        }
-    ))
+    # [{"timestamp": int, "amount": int}, ...]
+    # Timestamps are stored as milliseconds since the epoch, the unit the
+    # chart expects, so they never need converting when rendering.
+    records: DataFrame = DF(  # pyright: ignore[reportAssignmentType]
+        DataFrame(
+            {
+                "timestamp": Series(dtype="int64"),
+                "amount": Series(dtype="int32")
+            }
+        ),
+        doc=(
+            "Production records sorted by timestamp. `timestamp` is int64 "
+            "milliseconds since the epoch (previously datetime64[ns]); use "
+            "`pandas.to_datetime(records['timestamp'], unit='ms')` for "
+            "datetimes. Frames with a datetime `timestamp` column are still "
+            "accepted when assigned or passed to `add_records`; an assigned "
+            "frame is replaced by its sorted copy in this schema."
+        ),
+    )
 
     # Form fields
     new_timestamp: datetime = Date(  # pyright: ignore[reportAssignmentType]
@@ -33,6 +146,7 @@ class OrangeProductionWidget(Parameterized):
 
     new_amount: int = Integer(  # pyright: ignore[reportAssignmentType]
         default=None,  # pyright: ignore[reportArgumentType]
+        bounds=(0, 2_147_483_647),  # amounts are stored as int32
         doc="Number of oranges produced.",
     )
 
@@ -60,20 +174,74 @@ class OrangeProductionWidget(Parameterized):
 
         # ---- visual components
         self._chart = ECharts(self._empty_chart_option(), height=350, sizing_mode="stretch_width")
+        # Static parts of the chart option, built once and shared by updates
+        self._chart_option: dict[str, Any] = {
+            "tooltip": {"trigger": "axis"},
+            "xAxis": {
+                "type": "time",
+                "name": "Time",
+            },
+            "yAxis": {
+                "type": "value",
+                "name": "Total oranges",
+            },
+        }
+        self._chart_series: dict[str, Any] = {
+            "type": "line",
+            "name": "Total production",
+            "smooth": False,
+            "showSymbol": True,
+            "sampling": "lttb",
+        }
         self._table = Tabulator.from_param(  # pyright: ignore[reportUnknownMemberType]
             self.param.records,
             show_index=False,
             sizing_mode="stretch_width",
             layout='fit_data_stretch',
-            pagination="local",
+            # Only the visible page is sent to the browser, so replacing the
+            # value on each add costs no more on the wire than streaming the
+            # new row, and keeps the table bound to `records`
+            pagination="remote",
             page_size=10,
             titles={
                 "timestamp": "Timestamp",
                 "amount": "Oranges produced",
-            }
+            },
+            formatters={
+                "timestamp": DateFormatter(format="%Y-%m-%d %H:%M:%S"),
+            },
+            # Timestamps are raw epoch milliseconds under the formatter, so
+            # they are read-only; amounts stay editable within int32
+            editors={
+                "timestamp": None,
+                "amount": {"type": "number", "min": 0, "max": 2_147_483_647, "step": 1},
+            },
+        )
+
+        self._feedback_display = Str(
+            self.param.feedback,
+            # Str renders a <pre>; keep the message in the surrounding font
+            stylesheets=["pre { margin: 0; font-family: inherit; white-space: pre-wrap; }"],
         )
 
-        self._feedback_display = HTML(bind(str, self.param.feedback))  # pyright: ignore[reportUnknownArgumentType]
+        # ---- record storage
+        # Preallocated column buffers, kept sorted by timestamp, of which the
+        # first `_size` entries are in use. They double in capacity when full,
+        # so inserting a record doesn't reallocate the whole table, and
+        # `records` is published as a copy of them. `_chart_data` holds the
+        # matching chart points so only the new point has to be converted; it
+        # is one list reused for the widget's lifetime and only kept filled
+        # while the chart is small enough to be sent without downsampling.
+        # `_records_frame` is the last frame built from them, used to detect
+        # `records` being replaced.
+        self._timestamp_buf = np.empty(_INITIAL_CAPACITY, dtype="int64")
+        self._amount_buf = np.empty(_INITIAL_CAPACITY, dtype="int32")
+        self._size = 0
+        self._chart_data: list[list[int]] = []
+        self._records_frame = self.records
+        self._chart_update_pending = False
+
+        self.param.watch(self._on_records_change, "records")
 
     def _add_record(self, _: Event) -> None:
         """
@@ -86,58 +254,218 @@ class OrangeProductionWidget(Parameterized):
         - timestamp must not be empty
         """
 
-        if self.timestamp_input.value is None:
-            self.feedback = "Error: Please select a valid timestamp."
-            self._feedback_display.css_classes = ["error"]
+        # Send the table and feedback changes to the browser together. When
+        # served, the chart follows separately on its debounced refresh.
+        with hold():
+            if self.timestamp_input.value is None:
+                self.feedback = "Error: Please select a valid timestamp."
+                self._feedback_display.css_classes = ["error"]
+                return
+            if self.amount_input.value is None or self.new_amount < 0:
+                self.feedback = "Error: Please enter a valid number of oranges."
+                self._feedback_display.css_classes = ["error"]
+                return
+
+            self._sync_columns()
+
+            # Scalars go straight into the buffers and chart points, no
+            # intermediate arrays or frames are built for the new row
+            amount = self.new_amount
+            timestamp = np.datetime64(self.new_timestamp, "ms").astype(np.int64).item()
+            idx = self._insert(timestamp, amount)
+            if self._size <= _CHART_MAX_POINTS:
+                self._chart_data.insert(idx, [timestamp, amount])
+            else:
+                self._chart_data.clear()
+
+            self._records_frame = self._build_records()
+            self.param.update(
+                records=self._records_frame,
+                feedback=f"Record added: {amount} oranges at {self.new_timestamp:%Y-%m-%d %H:%M:%S}",
+            )
+            self._feedback_display.css_classes = ["success"]
+
+    def add_records(self, records: DataFrame) -> None:
+        """
+        Add many records at once, e.g. when importing existing data.
+
+        The rows are merged into the sorted buffers in one pass and
+        `records` is assigned a single time, so watchers run once for the
+        whole batch instead of once per row.
+
+        Raises ValueError if any row has an empty timestamp or amount, or a
+        negative amount; nothing is added in that case.
+        """
+
+        _check_records(records)
+        self._sync_columns()
+
+        size = self._size
+        self._load(
+            np.concatenate((self._timestamp_buf[:size], _epoch_ms(records["timestamp"]))),
+            np.concatenate((self._amount_buf[:size], _int32_amounts(records["amount"]))),
+        )
+
+        self._records_frame = self._build_records()
+        with hold():
+            self.param.update(records=self._records_frame)
+
+    def _build_records(self) -> DataFrame:
+        """
+        Build a records frame from the used part of the buffers.
+
+        The columns are copied, so frames already handed out never change
+        when a later insert shifts the buffers, and table edits only touch
+        the frame until they have been validated and reloaded.
+        """
+
+        return DataFrame(
+            {"timestamp": self._timestamp_buf[:self._size], "amount": self._amount_buf[:self._size]},
+            index=RangeIndex(self._size),
+            copy=True,
+        )
+
+    def _insert(self, timestamp: int, amount: int) -> int:
+        """
+        Insert a record into the sorted buffers and return its position.
+        """
+
+        size = self._size
+        if size == len(self._timestamp_buf):
+            self._resize(2 * size)
+
+        if size == 0 or timestamp >= self._timestamp_buf[size - 1]:
+            # Records usually arrive in time order, so nothing needs to move
+            idx = size
+        else:
+            idx = int(np.searchsorted(self._timestamp_buf[:size], timestamp, side="right"))
+            self._timestamp_buf[idx + 1:size + 1] = self._timestamp_buf[idx:size]
+            self._amount_buf[idx + 1:size + 1] = self._amount_buf[idx:size]
+        self._timestamp_buf[idx] = timestamp
+        self._amount_buf[idx] = amount
+        self._size += 1
+
+        return idx
+
+    def _resize(self, capacity: int) -> None:
+        timestamp_buf = np.empty(capacity, dtype="int64")
+        amount_buf = np.empty(capacity, dtype="int32")
+        timestamp_buf[:self._size] = self._timestamp_buf[:self._size]
+        amount_buf[:self._size] = self._amount_buf[:self._size]
+        self._timestamp_buf = timestamp_buf
+        self._amount_buf = amount_buf
+
+    def _on_records_change(self, event: Event) -> None:
+        """
+        Bring the buffers up to date with `records`, then refresh the chart.
+
+        Table edits modify the frame itself and then re-send the same object,
+        which the identity check in `_sync_columns` cannot detect. The edit
+        may have broken the sort order, so those always reload into the
+        buffers and publish a newly sorted frame in place of the edited one.
+        An edit that fails validation is reported through `feedback` and
+        undone, as the buffers still hold the records from before it.
+        """
+
+        if event.new is event.old:
+            try:
+                self._sync_columns(force=True)
+            except ValueError as e:
+                self.feedback = f"Error: {e}"
+                self._feedback_display.css_classes = ["error"]
+            self._records_frame = self._build_records()
+            self.records = self._records_frame  # runs this watcher again
+            # The table's link from `records` is paused while it applies the
+            # edit, so it has to be given the sorted frame directly
+            self._table.value = self._records_frame
             return
-        if self.amount_input.value is None or self.new_amount < 0:
-            self.feedback = "Error: Please enter a valid number of oranges."
-            self._feedback_display.css_classes = ["error"]
+
+        assigned = self.records is not self._records_frame
+        try:
+            self._sync_columns()
+        except ValueError:
+            # Put back the frame the buffers still hold before reporting it
+            self.records = event.old
+            raise
+        if assigned:
+            # Replace the assigned frame with the sorted int64 one
+            self._records_frame = self._build_records()
+            self.records = self._records_frame  # runs this watcher again
             return
+        self._update_chart()
 
-        new_row = DataFrame({"timestamp": [self.new_timestamp], "amount": [self.new_amount]})
-        
-        self.records = concat([self.records, new_row], ignore_index=True) \
-            .sort_values("timestamp") \
-            .reset_index(drop=True)
+    def _sync_columns(self, force: bool = False) -> None:
+        """
+        Reload the sorted buffers if `records` was assigned from outside.
+        """
 
-        self.feedback = f"Record added: {self.new_amount} oranges at {self.new_timestamp:%Y-%m-%d %H:%M:%S}"
-        self._feedback_display.css_classes = ["success"]
+        if self.records is self._records_frame and not force:
+            return
+
+        _check_records(self.records)
+        self._load(
+            _epoch_ms(self.records["timestamp"]),
+            _int32_amounts(self.records["amount"]),
+        )
+        self._records_frame = self.records
+
+    def _load(self, timestamps: np.ndarray, amounts: np.ndarray) -> None:
+        """
+        Replace the buffers and chart points with the given, unsorted, columns.
+        """
+
+        order = np.argsort(timestamps, kind="stable")
+
+        self._size = 0  # nothing to carry over into the new buffers
+        self._resize(max(_INITIAL_CAPACITY, len(order)))
+        self._size = len(order)
+        self._timestamp_buf[:self._size] = timestamps[order]
+        self._amount_buf[:self._size] = amounts[order]
+
+        self._chart_data.clear()
+        if self._size <= _CHART_MAX_POINTS:
+            self._chart_data.extend(
+                np.column_stack((self._timestamp_buf[:self._size], self._amount_buf[:self._size])).tolist()
+            )
 
-    @depends("records", watch=True)
     def _update_chart(self) -> None:
-        option = {
-            "tooltip": {"trigger": "axis"},
-            "xAxis": {
-                "type": "time",
-                "name": "Time",
-            },
-            "yAxis": {
-                "type": "value",
-                "name": "Total oranges",
-            },
-            "series": [
-                {
-                    "type": "line",
-                    "name": "Total production",
-                    "smooth": False,
-                    "showSymbol": True,
-                    "data": [
-                        [ts.timestamp() * 1000, amount]
-                        for ts, amount in zip(self.records["timestamp"], self.records["amount"])
-                    ]
-                }
-            ],
-        }
+        """
+        Schedule a chart refresh, merging bursts of record changes.
+        """
+
+        if self._chart_update_pending:
+            return
+
+        doc = state.curdoc
+        if doc is None or doc.session_context is None:
+            # Not served, so there is no event loop to defer the refresh to
+            self._flush_chart()
+            return
 
-        self._chart.object = option
+        # A one-shot timeout is dropped by the document once it has run,
+        # unlike periodic callbacks which Panel keeps track of per session
+        self._chart_update_pending = True
+        doc.add_timeout_callback(self._flush_chart, _CHART_DEBOUNCE_MS)
+
+    def _flush_chart(self) -> None:
+        self._chart_update_pending = False
+
+        if self._size == 0:
+            self._chart.object = self._empty_chart_option()
+            return
+
+        if self._size > _CHART_MAX_POINTS:
+            data = _downsample(self._timestamp_buf[:self._size], self._amount_buf[:self._size], _CHART_MAX_POINTS)
+        else:
+            data = list(self._chart_data)
+
+        # Only the outer dicts and the data list are new. Panel and Bokeh
+        # compare by value, so updating the previous option in place would
+        # not be sent to the browser.
+        self._chart.object = {**self._chart_option, "series": [{**self._chart_series, "data": data}]}
 
     def _empty_chart_option(self) -> dict[str, Any]:
-        return {
-            "xAxis": {"type": "time"},
-            "yAxis": {"type": "value"},
-            "series": [],
-        }
+        return _EMPTY_CHART_OPTION
 
     def roots(self) -> dict[str, Viewable]:
         return {